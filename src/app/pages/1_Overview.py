@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from trends import read_trend_cache, update_trend_cache, write_trend_cache, compute_trends, ROLLING_WINDOW
 
 # Page Config
 st.set_page_config(page_title="Overview | Biodiversity Explorer", page_icon="📊", layout="wide")
@@ -109,3 +113,68 @@ fig2.update_layout(
 )
 
 st.plotly_chart(fig2, use_container_width=True)
+
+# Taxon Trends
+st.subheader("📉 Fastest Declining / Increasing Taxa")
+st.markdown("Per-taxon yearly counts, occupied 1° grid cells and linear trends, computed for all taxa in one grouped pass.")
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+data_path = os.path.join(root_dir, "data", "cleaned_dataset.csv")
+trend_cache_path = os.path.join(root_dir, "data", "trend_cache.pkl")
+
+# Keyed on the dataset's path and mtime so the DataFrame itself is never hashed
+@st.cache_resource
+def load_trend_cache(data_path, data_mtime, _df):
+    cache = read_trend_cache(trend_cache_path)
+    updated = update_trend_cache(cache, _df)
+    return {'cache': updated, 'saved': updated is cache}
+
+trend_state = load_trend_cache(data_path, os.path.getmtime(data_path), df)
+if not trend_state['saved']:
+    # A failed write (read-only deploy) is reported by write_trend_cache; the
+    # in-memory cache is still used and the write is not retried on every rerun
+    write_trend_cache(trend_state['cache'], trend_cache_path)
+    trend_state['saved'] = True
+trend_stats = trend_state['cache']['stats']
+
+# The pivot and slope fits only depend on the data and the fit window, not on the
+# ranking widgets, so reruns from the radio/selectbox/number input reuse them
+@st.cache_data
+def load_trends(data_path, data_mtime, recent_years, _stats):
+    return compute_trends(_stats, recent_years=recent_years)
+
+col_a, col_b, col_c = st.columns(3)
+with col_a:
+    direction = st.radio("Direction", ["Declining", "Increasing"], horizontal=True)
+with col_b:
+    sort_metric = st.selectbox("Rank by", ["relative_slope", "count_slope", "cells_slope"])
+with col_c:
+    min_total = st.number_input("Minimum observations", min_value=1, value=20, step=10)
+
+span = max_year - min_year + 1
+recent_years = st.slider("Fit trend over last N years", 2, max(span, 2), min(span, 20)) if span > 2 else None
+
+trends = load_trends(data_path, os.path.getmtime(data_path), recent_years, trend_stats)
+trends = trends[trends['total'] >= min_total]
+trends = trends.sort_values(sort_metric, ascending=(direction == "Declining"))
+
+st.dataframe(trends.head(50), use_container_width=True, hide_index=True)
+
+if not trends.empty:
+    selected_taxon = st.selectbox("Inspect taxon", trends['taxon'].head(50))
+    taxon_years = trend_stats[trend_stats['taxon'] == selected_taxon].set_index('year')
+    taxon_years = taxon_years.reindex(range(int(trend_stats['year'].min()), int(trend_stats['year'].max()) + 1), fill_value=0)
+    taxon_years['rolling'] = taxon_years['count'].rolling(ROLLING_WINDOW, min_periods=1).mean()
+    taxon_years = taxon_years.reset_index()
+
+    fig3 = px.line(taxon_years, x='year', y=['count', 'rolling', 'cells'],
+                   title=f"{selected_taxon}: yearly counts, {ROLLING_WINDOW}-year rolling mean and occupied cells",
+                   color_discrete_sequence=['#00f260', '#0575e6', '#f7b733'])
+    fig3.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        xaxis=dict(showgrid=False),
+        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+    )
+    st.plotly_chart(fig3, use_container_width=True)
@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from coordinate_qc import FLAG_NAMES, exclude_flagged
 
 # Page Config
 st.set_page_config(page_title="Geospatial | Biodiversity Explorer", page_icon="🌍", layout="wide")
@@ -21,7 +25,7 @@ def load_data():
     data_path = os.path.join(root_dir, "data", "cleaned_dataset.csv")
     if not os.path.exists(data_path):
         return pd.DataFrame()
-    return pd.read_csv(data_path)
+    return pd.read_csv(data_path, dtype={'coordinateFlags': 'uint8'})
 
 df = load_data()
 
@@ -40,6 +44,11 @@ with st.sidebar:
     min_year = int(df['year'].min())
     max_year = int(df['year'].max())
     selected_year_range = st.slider("Select Year Range", min_year, max_year, (min_year, max_year))
+    
+    # Coordinate Quality Filter
+    excluded_flags = []
+    if 'coordinateFlags' in df.columns:
+        excluded_flags = st.multiselect("Exclude Coordinate Issues", list(FLAG_NAMES.values()))
 
 # Apply Filters
 filtered_df = df.copy()
@@ -51,6 +60,9 @@ filtered_df = filtered_df[
     (filtered_df['year'] <= selected_year_range[1])
 ]
 
+flag_mask = sum(bit for bit, name in FLAG_NAMES.items() if name in excluded_flags)
+filtered_df = exclude_flagged(filtered_df, flag_mask)
+
 st.info(f"Showing {len(filtered_df):,} observations.")
 
 import folium
@@ -0,0 +1,201 @@
+import numpy as np
+import os
+import sys
+
+# Offline build script for the bundled reference/country_grid.npz. It needs
+# timezonefinder and tzdata (default source) or pyshp (shapefile source), which
+# are not runtime dependencies of the dashboard.
+
+# Cell size (degrees) of the bundled country lookup grid
+GRID_RES = 0.1
+
+# Natural Earth uses -99 for a few disputed or unassigned codes; GBIF uses these instead
+NAME_OVERRIDES = {'Kosovo': 'XK'}
+
+# Known island and coastal records that must not be flagged as outside their country
+REGRESSION_POINTS = [
+    ('Tenerife', 28.29, -16.63, 'ES'),
+    ('Mallorca', 39.62, 2.99, 'ES'),
+    ('Galapagos', -0.74, -90.31, 'EC'),
+    ('Azores', 37.74, -25.67, 'PT'),
+    ('Madeira', 32.65, -16.91, 'PT'),
+    ('Zanzibar', -6.16, 39.19, 'TZ'),
+    ('Okinawa', 26.21, 127.68, 'JP'),
+    ('Gotland', 57.64, 18.29, 'SE'),
+    ('Shetland', 60.15, -1.15, 'GB'),
+    ('Jeju', 33.50, 126.53, 'KR'),
+    ('Rhodes', 36.43, 28.22, 'GR'),
+    ('Lesbos', 39.10, 26.55, 'GR'),
+    ('Key West', 24.56, -81.78, 'US'),
+    ('Aleutians', 53.88, -166.54, 'US'),
+    ('Nassau', 25.05, -77.35, 'BS'),
+    ('Puerto Rico', 18.22, -66.59, 'PR'),
+    ('Trinidad', 10.45, -61.25, 'TT'),
+    ('Maseru', -29.31, 27.48, 'LS'),
+    ('Windhoek', -22.56, 17.08, 'NA'),
+    ('Vatican City', 41.9029, 12.4534, 'VA'),
+    ('Monaco', 43.7384, 7.4246, 'MC'),
+]
+
+# Records that must still be flagged as outside their country
+MISMATCH_POINTS = [
+    ('Paris as US', 48.85, 2.35, 'US'),
+    ('Tenerife as PT', 28.29, -16.63, 'PT'),
+    ('Open Atlantic as BR', -20.0, -20.0, 'BR'),
+]
+
+
+def _shapefile_countries(shapefile_path):
+    # Natural Earth admin-0 countries, e.g. ne_10m_admin_0_countries.shp
+    import shapefile
+    reader = shapefile.Reader(shapefile_path)
+    fields = {f[0].upper(): f[0] for f in reader.fields[1:]}
+    code_field = next((fields[f] for f in ('ISO_A2_EH', 'ISO_A2') if f in fields), None)
+    if code_field is None:
+        raise ValueError(f"{shapefile_path} has no ISO_A2_EH or ISO_A2 field")
+    name_field = fields.get('NAME')
+
+    countries = {}
+    for rec, shape in zip(reader.records(), reader.shapes()):
+        name = rec[name_field] if name_field else ''
+        code = NAME_OVERRIDES.get(name, rec[code_field])
+        if code == '-99':
+            print(f"Warning: dropping '{name}', it has no ISO alpha-2 code")
+            continue
+        bounds = list(shape.parts) + [len(shape.points)]
+        rings = [np.asarray(shape.points[start:end], dtype=float) for start, end in zip(bounds[:-1], bounds[1:])]
+        countries.setdefault(code, []).extend(rings)
+    return countries
+
+
+def _timezone_countries():
+    # OpenStreetMap based timezone polygons (timezone-boundary-builder), which follow
+    # country borders; each zone is mapped to its country through tzdata's zone.tab
+    import tzdata
+    from timezonefinder import TimezoneFinder
+
+    zone_tab = os.path.join(os.path.dirname(tzdata.__file__), 'zoneinfo', 'zone.tab')
+    zone_country = {}
+    with open(zone_tab) as f:
+        for line in f:
+            if not line.startswith('#'):
+                fields = line.rstrip('\n').split('\t')
+                zone_country[fields[2]] = fields[0]
+
+    tf = TimezoneFinder()
+    countries = {}
+    for zone in tf.timezone_names:
+        code = zone_country.get(zone)
+        if code is None:
+            # Etc/GMT* zones cover the open ocean
+            continue
+        for polygon in tf.get_geometry(tz_name=zone, coords_as_pairs=False):
+            rings = [np.column_stack(ring) for ring in polygon]
+            countries.setdefault(code, []).extend(rings)
+    return countries
+
+
+def _fill_cells(rings, grid_res, n_rows, n_cols):
+    """Flat indices of cells whose centre lies inside the rings (even-odd rule)."""
+    edges = []
+    for ring in rings:
+        closed = ring if np.array_equal(ring[0], ring[-1]) else np.vstack([ring, ring[:1]])
+        edges.append(np.column_stack([closed[:-1], closed[1:]]))
+    x0, y0, x1, y1 = np.concatenate(edges).T
+    x0, y0, x1, y1 = x0[y0 != y1], y0[y0 != y1], x1[y0 != y1], y1[y0 != y1]
+
+    # Rows whose centre latitude lies in [min(y0, y1), max(y0, y1)) are crossed by the edge
+    row_lo = np.ceil((np.minimum(y0, y1) + 90) / grid_res - 0.5).astype(np.int64)
+    row_hi = np.ceil((np.maximum(y0, y1) + 90) / grid_res - 0.5).astype(np.int64)
+    row_lo, row_hi = np.clip(row_lo, 0, n_rows), np.clip(row_hi, 0, n_rows)
+    spans = row_hi - row_lo
+    edge = np.repeat(np.arange(len(spans)), spans)
+    rows = row_lo[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans)
+
+    y = -90 + (rows + 0.5) * grid_res
+    x = x0[edge] + (y - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+
+    # Pair up sorted crossings on each row and fill the cells in between
+    order = np.lexsort((x, rows))
+    rows, x = rows[order], x[order]
+    rows, x_start, x_end = rows[0::2], x[0::2], x[1::2]
+    col_lo = np.clip(np.ceil((x_start + 180) / grid_res - 0.5).astype(np.int64), 0, n_cols)
+    col_hi = np.clip(np.ceil((x_end + 180) / grid_res - 0.5).astype(np.int64), 0, n_cols)
+    spans = np.maximum(col_hi - col_lo, 0)
+    run = np.repeat(np.arange(len(spans)), spans)
+    cols = col_lo[run] + np.arange(len(run)) - np.repeat(np.cumsum(spans) - spans, spans)
+    return rows[run] * n_cols + cols
+
+
+def _vertex_cells(rings, grid_res, n_rows, n_cols):
+    points = np.concatenate(rings)
+    rows = np.clip(np.floor((points[:, 1] + 90) / grid_res).astype(np.int64), 0, n_rows - 1)
+    cols = np.clip(np.floor((points[:, 0] + 180) / grid_res).astype(np.int64), 0, n_cols - 1)
+    return np.unique(rows * n_cols + cols)
+
+
+def build_country_grid(output_path, shapefile_path=None, grid_res=GRID_RES):
+    if shapefile_path:
+        print(f"Reading country polygons from {shapefile_path}...")
+        countries = _shapefile_countries(shapefile_path)
+    else:
+        print("Reading country polygons from timezonefinder...")
+        countries = _timezone_countries()
+
+    # Index 0 is reserved for cells outside every country
+    codes = [''] + sorted(countries)
+    n_rows, n_cols = int(round(180 / grid_res)), int(round(360 / grid_res))
+    grid = np.zeros(n_rows * n_cols, dtype=np.uint8 if len(codes) <= 256 else np.uint16)
+
+    print(f"Rasterising {len(countries)} countries onto a {n_rows}x{n_cols} grid...")
+    filled = {code: _fill_cells(rings, grid_res, n_rows, n_cols) for code, rings in countries.items()}
+
+    # Paint the largest countries first so enclaves (e.g. Lesotho) end up on top
+    for code in sorted(filled, key=lambda c: len(filled[c]), reverse=True):
+        grid[filled[code]] = codes.index(code)
+
+    # Cells touched by a coastline but not filled yet (small islands, narrow
+    # peninsulas) take the country of the vertex, without overwriting other land.
+    # Countries smaller than a cell (e.g. Vatican City) claim their cells anyway.
+    for code in sorted(countries, key=lambda c: len(filled[c])):
+        cells = _vertex_cells(countries[code], grid_res, n_rows, n_cols)
+        if len(filled[code]) > 0:
+            cells = cells[grid[cells] == 0]
+        grid[cells] = codes.index(code)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    np.savez_compressed(output_path, grid=grid.reshape(n_rows, n_cols), codes=np.array(codes), resolution=grid_res)
+    print(f"Country grid saved to {output_path}")
+
+
+def check_country_grid(path):
+    """Fail unless REGRESSION_POINTS pass and MISMATCH_POINTS are flagged."""
+    import pandas as pd
+    from coordinate_qc import load_reference_grid, flag_coordinates, FLAG_NAMES, FLAG_COUNTRY_MISMATCH
+
+    points = REGRESSION_POINTS + MISMATCH_POINTS
+    names, lats, lons, country_codes = zip(*points)
+    df = pd.DataFrame({'decimalLatitude': lats, 'decimalLongitude': lons, 'countryCode': country_codes})
+    flags = flag_coordinates(df, ref=load_reference_grid(path))
+
+    failures = 0
+    for i, (name, code, flag) in enumerate(zip(names, country_codes, flags)):
+        labels = ', '.join(label for bit, label in FLAG_NAMES.items() if flag & bit) or 'no flags'
+        if i < len(REGRESSION_POINTS) and flag:
+            print(f"Regression point {name} ({code}) flagged: {labels}")
+            failures += 1
+        elif i >= len(REGRESSION_POINTS) and not flag & FLAG_COUNTRY_MISMATCH:
+            print(f"Mismatch point {name} ({code}) not flagged as outside: {labels}")
+            failures += 1
+    if failures:
+        raise SystemExit(1)
+    print(f"All {len(points)} regression points passed.")
+
+
+if __name__ == "__main__":
+    # Usage: python src/build_country_grid.py [countries.shp]
+    #        python src/build_country_grid.py --check
+    out = os.path.join(os.path.dirname(__file__), "reference", "country_grid.npz")
+    if sys.argv[1:] != ['--check']:
+        build_country_grid(out, sys.argv[1] if len(sys.argv) > 1 else None)
+    check_country_grid(out)
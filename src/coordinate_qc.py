@@ -0,0 +1,150 @@
+import pandas as pd
+import numpy as np
+import os
+
+# Bit flags stored in the 'coordinateFlags' column (0 means no issue found)
+FLAG_ZERO = 1              # (0, 0) coordinates
+FLAG_SWAPPED = 2           # Coordinates match countryCode only with latitude and longitude swapped
+FLAG_CENTROID = 4          # Coordinates sit on the country centroid
+FLAG_COUNTRY_MISMATCH = 8  # Coordinates fall outside countryCode
+
+FLAG_NAMES = {
+    FLAG_ZERO: "Zero coordinates",
+    FLAG_SWAPPED: "Swapped lat/lon",
+    FLAG_CENTROID: "Country centroid",
+    FLAG_COUNTRY_MISMATCH: "Outside countryCode",
+}
+
+# Precomputed country lookup grid, built by build_country_grid.py
+REFERENCE_GRID = os.path.join(os.path.dirname(__file__), "reference", "country_grid.npz")
+# Reference country centroids used by geocoders (one row per country and source)
+REFERENCE_CENTROIDS = os.path.join(os.path.dirname(__file__), "reference", "country_centroids.csv")
+
+# Territories that some reference polygons (e.g. Natural Earth) merge into another
+# country; only used when the grid has no cells of its own for the territory
+COUNTRY_ALIASES = {'GF': 'FR'}
+
+# Records within this many grid cells of their country are not flagged as outside
+# it, which absorbs rasterised coastlines, borders and small islands
+MATCH_RADIUS = 2
+
+# Distance (km) from a reference centroid within which a record is flagged
+CENTROID_TOLERANCE_KM = 1.0
+# Countries covering fewer grid cells than this (e.g. Vatican City, Monaco) are
+# skipped by the centroid test, as the tolerance covers much of their area
+MIN_CENTROID_CELLS = 4
+
+
+def load_reference_grid(path=REFERENCE_GRID, centroids_path=REFERENCE_CENTROIDS):
+    with np.load(path) as ref:
+        ref = {key: ref[key] for key in ref.files}
+    ref['footprint'] = np.bincount(ref['grid'].ravel(), minlength=len(ref['codes']))
+    # 'NA' is Namibia, not a missing value
+    ref['centroids'] = pd.read_csv(centroids_path, keep_default_na=False)
+    return ref
+
+
+def _cell_index(lat, lon, ref):
+    res = float(ref['resolution'])
+    n_rows, n_cols = ref['grid'].shape
+    rows = np.clip(np.floor((lat + 90) / res).astype(np.int64), 0, n_rows - 1)
+    cols = np.clip(np.floor((lon + 180) / res).astype(np.int64), 0, n_cols - 1)
+    return rows, cols
+
+
+def _lookup_codes(country_codes, categories, aliases=None):
+    # Position of each code in categories plus one; unknown or missing codes map to 0.
+    # The handful of distinct codes is resolved once, then broadcast back to the rows.
+    row_codes, uniques = pd.factorize(country_codes)
+    uniques = pd.Series(uniques, dtype=object)
+    if aliases:
+        uniques = uniques.where(uniques.isin(categories), uniques.replace(aliases))
+    unique_idx = pd.Categorical(uniques, categories=categories).codes.astype(np.int64) + 1
+    return np.append(unique_idx, 0)[row_codes]
+
+
+def _matches_country(lat, lon, country_idx, ref, radius=MATCH_RADIUS):
+    grid = ref['grid']
+    n_rows, n_cols = grid.shape
+    rows, cols = _cell_index(lat, lon, ref)
+    match = grid[rows, cols] == country_idx
+
+    # Fall back to the surrounding cells only for the few rows that missed
+    miss = np.nonzero(~match)[0]
+    rows, cols, country_idx = rows[miss], cols[miss], country_idx[miss]
+    found = np.zeros(len(miss), dtype=bool)
+    for dr in range(-radius, radius + 1):
+        r = np.clip(rows + dr, 0, n_rows - 1)
+        for dc in range(-radius, radius + 1):
+            found |= grid[r, (cols + dc) % n_cols] == country_idx
+    match[miss] = found
+    return match
+
+
+def _near_centroid(lat, lon, country_codes, centroids, tolerance_km):
+    # Countries can have several reference centroids (one per source), so the
+    # table is laid out as a (country, source) matrix padded with NaN
+    codes = np.sort(centroids['countryCode'].unique())
+    country_idx = _lookup_codes(country_codes, codes)
+    slot = centroids.groupby('countryCode').cumcount().to_numpy()
+    position = np.searchsorted(codes, centroids['countryCode'].to_numpy()) + 1
+    ref_lat = np.full((len(codes) + 1, slot.max() + 1), np.nan)
+    ref_lon = ref_lat.copy()
+    ref_lat[position, slot] = centroids['latitude'].to_numpy()
+    ref_lon[position, slot] = centroids['longitude'].to_numpy()
+
+    # Equirectangular distance, accurate to well under a metre at this scale
+    dy = (lat[:, None] - ref_lat[country_idx]) * 110.57
+    dx = (lon[:, None] - ref_lon[country_idx]) * 111.32 * np.cos(np.radians(lat))[:, None]
+    with np.errstate(invalid='ignore'):
+        return ((dx ** 2 + dy ** 2) <= tolerance_km ** 2).any(axis=1)
+
+
+def flag_coordinates(df, ref=None, centroid_tolerance_km=CENTROID_TOLERANCE_KM):
+    """Coordinate quality bit flags for every row of df as a uint8 array.
+
+    Country checks are only applied to rows with a countryCode present in the
+    reference data; other rows can still receive FLAG_ZERO.
+    """
+    if ref is None:
+        ref = load_reference_grid()
+
+    lat = df['decimalLatitude'].to_numpy(dtype=float)
+    lon = df['decimalLongitude'].to_numpy(dtype=float)
+    flags = np.zeros(len(df), dtype=np.uint8)
+
+    flags[(lat == 0) & (lon == 0)] |= FLAG_ZERO
+
+    if 'countryCode' not in df.columns:
+        return flags
+
+    country_codes = df['countryCode'].to_numpy()
+    country_idx = _lookup_codes(country_codes, ref['codes'][1:], COUNTRY_ALIASES)
+    known = country_idx > 0
+
+    outside = known & ~_matches_country(lat, lon, country_idx, ref)
+    flags[outside] |= FLAG_COUNTRY_MISMATCH
+
+    # Only longitudes that are valid latitudes can have been swapped
+    can_swap = outside & (np.abs(lon) <= 90)
+    swapped = can_swap & _matches_country(lon, lat, country_idx, ref)
+    flags[swapped] |= FLAG_SWAPPED
+
+    near_centroid = _near_centroid(lat, lon, country_codes, ref['centroids'], centroid_tolerance_km)
+    microstate = known & (ref['footprint'][country_idx] < MIN_CENTROID_CELLS)
+    flags[near_centroid & ~microstate] |= FLAG_CENTROID
+
+    return flags
+
+
+def exclude_flagged(df, flag_mask, column='coordinateFlags'):
+    """Rows of df without any of the bits in flag_mask set."""
+    if flag_mask == 0 or column not in df.columns:
+        return df
+    return df[(df[column].to_numpy() & flag_mask) == 0]
+
+
+def summarize_flags(flags):
+    """Number of records carrying each flag."""
+    flags = np.asarray(flags)
+    return pd.Series({name: int(((flags & bit) != 0).sum()) for bit, name in FLAG_NAMES.items()})
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import os
+from coordinate_qc import flag_coordinates, summarize_flags
 
 def clean_data(input_path, output_path):
     print(f"Loading data from {input_path}...")
@@ -11,7 +12,8 @@ def clean_data(input_path, output_path):
     except:
         pass
     
-    df = pd.read_csv(input_path)
+    # 'NA' is Namibia's countryCode, so keep it out of pandas' default NA strings
+    df = pd.read_csv(input_path, converters={'countryCode': str})
     
     print(f"Initial shape: {df.shape}")
     
@@ -59,6 +61,11 @@ def clean_data(input_path, output_path):
         (df['decimalLongitude'] >= -180) & (df['decimalLongitude'] <= 180)
     ]
     
+    # 5. Coordinate quality flags (kept as a bit-flag column, records are not dropped)
+    print("Flagging coordinate issues...")
+    df['coordinateFlags'] = flag_coordinates(df)
+    print(summarize_flags(df['coordinateFlags']))
+    
     print(f"Shape after cleaning: {df.shape}")
     
     # Save
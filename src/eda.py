@@ -1,11 +1,14 @@
 
 
 import pandas as pd
+import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
 import seaborn as sns
 import plotly.express as px
+import plotly.graph_objects as go
 import os
 
 # Settings
@@ -13,6 +16,14 @@ plt.style.use('ggplot')
 FIG_DIR = r'c:\Users\ASUS\Desktop\Biodiversity\reports\figures'
 os.makedirs(FIG_DIR, exist_ok=True)
 
+# Global map raster size in pixels (0.25 degrees per pixel)
+MAP_WIDTH = 1440
+MAP_HEIGHT = 720
+# Points are binned in chunks so temporary arrays stay small
+RASTER_CHUNK = 1_000_000
+# The interactive map sums blocks of this many pixels per side to keep the HTML small
+HTML_BLOCK = 4
+
 def load_data(filepath):
     return pd.read_csv(filepath)
 
@@ -60,27 +71,121 @@ def plot_temporal_trends(df):
     plt.savefig(os.path.join(FIG_DIR, 'observations_by_month.png'))
     plt.close()
 
-def plot_geographical_distribution(df):
+def rasterize_points(lon, lat, categories=None, n_categories=1, width=MAP_WIDTH, height=MAP_HEIGHT):
+    """Count points per pixel (and per category) in a single pass.
+
+    Returns an array of shape (n_categories, height, width) with row 0 at -90 latitude.
+    Points with missing or out-of-range coordinates are skipped.
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    n_pixels = width * height
+    counts = np.zeros(n_categories * n_pixels, dtype=np.int64)
+
+    # Every chunk adds an image-sized bincount, so chunks are never smaller than the image
+    chunk = max(RASTER_CHUNK, n_categories * n_pixels)
+    for start in range(0, len(lon), chunk):
+        end = start + chunk
+        chunk_lon, chunk_lat = lon[start:end], lat[start:end]
+        valid = (
+            np.isfinite(chunk_lon) & np.isfinite(chunk_lat)
+            & (np.abs(chunk_lon) <= 180) & (np.abs(chunk_lat) <= 90)
+        )
+        # Points exactly on +180 / +90 fall into the last column / row
+        x = np.minimum(((chunk_lon[valid] + 180) / 360 * width).astype(np.int64), width - 1)
+        y = np.minimum(((chunk_lat[valid] + 90) / 180 * height).astype(np.int64), height - 1)
+        idx = y * width + x
+        if categories is not None:
+            idx += np.asarray(categories[start:end], dtype=np.int64)[valid] * n_pixels
+        counts += np.bincount(idx, minlength=len(counts))
+
+    return counts.reshape(n_categories, height, width)
+
+
+def shade_counts(total, how='eq_hist'):
+    """Map pixel counts to [0, 1] intensities; empty pixels stay 0."""
+    shaded = np.zeros(total.shape)
+    filled = total > 0
+    if not filled.any():
+        return shaded
+
+    if how == 'log':
+        shaded[filled] = np.log1p(total[filled]) / np.log1p(total.max())
+    elif how == 'eq_hist':
+        # Histogram equalisation over occupied pixels only
+        values, inverse = np.unique(total[filled], return_inverse=True)
+        cdf = np.cumsum(np.bincount(inverse.ravel(), minlength=len(values)))
+        shaded[filled] = cdf[inverse.ravel()] / cdf[-1]
+    else:
+        raise ValueError(f"Unknown shading: {how}")
+    return shaded
+
+
+def render_raster(counts, colors=None, how='eq_hist', cmap='viridis', min_alpha=0.2):
+    """RGBA image from a (n_categories, height, width) count raster.
+
+    With colors (one RGB per category) each pixel gets the count-weighted mix of its
+    category colors; otherwise the total count is mapped through cmap.
+    """
+    total = counts.sum(axis=0)
+    shaded = shade_counts(total, how)
+    filled = total > 0
+
+    image = np.zeros(total.shape + (4,))
+    if colors is None:
+        image[..., :3] = plt.get_cmap(cmap)(shaded)[..., :3]
+        image[..., 3] = filled
+    else:
+        mix = np.tensordot(np.asarray(colors, dtype=float).T, counts, axes=1)
+        image[..., :3] = np.moveaxis(mix, 0, -1) / np.maximum(total, 1)[..., None]
+        image[..., 3] = np.where(filled, min_alpha + (1 - min_alpha) * shaded, 0)
+    return image
+
+
+def plot_geographical_distribution(df, how='eq_hist'):
     print("Plotting geographical distribution...")
-    # Simple scatter plot of lat/lon
-    plt.figure(figsize=(15, 10))
-    plt.scatter(df['decimalLongitude'], df['decimalLatitude'], alpha=0.1, s=1, c=df['decimalLongitude'], cmap='twilight')
-    plt.title('Global Distribution of Observations')
+    # Rasterise every observation instead of drawing one marker per point
+    kingdoms = df['kingdom'].fillna('Unknown')
+    kingdom_codes, kingdom_names = pd.factorize(kingdoms)
+    palette = sns.color_palette('tab10', len(kingdom_names))
+    counts = rasterize_points(df['decimalLongitude'], df['decimalLatitude'],
+                              categories=kingdom_codes, n_categories=len(kingdom_names))
+    image = render_raster(counts, colors=palette, how=how)
+
+    plt.figure(figsize=(15, 8))
+    plt.imshow(image, origin='lower', extent=[-180, 180, -90, 90], interpolation='nearest')
+    plt.legend(handles=[Patch(color=c, label=k) for k, c in zip(kingdom_names, palette)],
+               title='Kingdom', loc='lower left', fontsize='small')
+    plt.grid(False)
+    plt.title(f'Global Distribution of Observations ({len(df):,} records)')
     plt.xlabel('Longitude')
     plt.ylabel('Latitude')
     plt.tight_layout()
     plt.savefig(os.path.join(FIG_DIR, 'global_map_static.png'))
     plt.close()
     
-    # Plotly interactive map
+    # Plotly interactive map from the same raster: one marker per occupied block
+    # on a geographic basemap, with the total count and dominant kingdom on hover
     try:
-        # Sample for performance
-        sample_size = min(10000, len(df))
-        print(f"Sampling {sample_size} points for interactive map...")
-        sample_df = df.sample(sample_size)
-        fig = px.scatter_geo(sample_df, lat='decimalLatitude', lon='decimalLongitude', 
-                             color='kingdom', hover_name='scientificName',
-                             title='Sampled Observations Distribution')
+        height, width = MAP_HEIGHT // HTML_BLOCK, MAP_WIDTH // HTML_BLOCK
+        blocks = counts.reshape(len(kingdom_names), height, HTML_BLOCK, width, HTML_BLOCK).sum(axis=(2, 4))
+        total = blocks.sum(axis=0)
+        rows, cols = np.nonzero(total)
+        block_total = total[rows, cols]
+        dominant = np.asarray(kingdom_names)[blocks[:, rows, cols].argmax(axis=0)]
+        hover = [f"Observations: {n:,}<br>Dominant kingdom: {k}" for n, k in zip(block_total, dominant)]
+
+        fig = go.Figure(go.Scattergeo(
+            lat=-90 + (rows + 0.5) * 180 / height,
+            lon=-180 + (cols + 0.5) * 360 / width,
+            text=hover,
+            hoverinfo='text',
+            mode='markers',
+            marker=dict(size=3, symbol='square', color=shade_counts(total, how)[rows, cols],
+                        colorscale='Viridis', colorbar=dict(title='Density')),
+        ))
+        fig.update_layout(title='Observation Density (all records)',
+                          geo=dict(projection_type='natural earth', showland=True, showcountries=True))
         fig.write_html(os.path.join(FIG_DIR, 'interactive_map.html'))
     except Exception as e:
         print(f"Could not create interactive map: {e}")
@@ -0,0 +1,161 @@
+import pandas as pd
+import numpy as np
+import os
+
+# Grid resolution (degrees) used to count occupied cells per taxon and year
+GRID_RES = 1.0
+ROLLING_WINDOW = 5
+
+
+def _grid_cells(df, grid_res=GRID_RES):
+    # Encode each (lat, lon) as a single integer cell id on a regular grid
+    n_cols = int(np.ceil(360 / grid_res))
+    row = np.floor((df['decimalLatitude'].to_numpy() + 90) / grid_res).astype(np.int64)
+    col = np.floor((df['decimalLongitude'].to_numpy() + 180) / grid_res).astype(np.int64)
+    # Points on the +180 meridian belong to the last column
+    col = np.minimum(col, n_cols - 1)
+    return row * n_cols + col
+
+
+def _records(df, taxon_col='scientificName', grid_res=GRID_RES):
+    # The columns trend stats depend on: taxon, year and grid cell of every record
+    return pd.DataFrame({
+        'taxon': df[taxon_col].to_numpy(),
+        'year': df['year'].astype(int).to_numpy(),
+        'cell': _grid_cells(df, grid_res),
+    }).dropna(subset=['taxon'])
+
+
+def _aggregate(records):
+    return (
+        records.groupby(['taxon', 'year'], sort=True)
+        .agg(count=('cell', 'size'), cells=('cell', 'nunique'))
+        .reset_index()
+    )
+
+
+def _year_fingerprints(records):
+    # Row count and an order-independent hash sum per year; any added, removed or
+    # changed record changes the fingerprint of its year
+    hashes = pd.util.hash_pandas_object(records[['taxon', 'cell']], index=False).to_numpy()
+    return (
+        pd.DataFrame({'year': records['year'].to_numpy(), 'hash': hashes})
+        .groupby('year')['hash']
+        .agg(rows='size', hash='sum')
+    )
+
+
+def compute_yearly_stats(df, taxon_col='scientificName', grid_res=GRID_RES):
+    """Observation count and occupied grid cells per taxon and year (long format)."""
+    return _aggregate(_records(df, taxon_col, grid_res))
+
+
+def update_trend_cache(cache, df, taxon_col='scientificName', grid_res=GRID_RES):
+    """Bring a trend cache up to date with df.
+
+    Only years whose records changed (new, removed, backfilled or edited) are
+    recomputed; the whole cache is rebuilt if it was made with other settings.
+    Returns the cache itself when nothing changed, otherwise a new cache dict.
+    """
+    records = _records(df, taxon_col, grid_res)
+    fingerprints = _year_fingerprints(records)
+
+    if cache is None or cache.get('taxon_col') != taxon_col or cache.get('grid_res') != grid_res:
+        return {'taxon_col': taxon_col, 'grid_res': grid_res,
+                'fingerprints': fingerprints, 'stats': _aggregate(records)}
+
+    old = cache['fingerprints'].reindex(fingerprints.index)
+    changed = fingerprints.index[(old['rows'] != fingerprints['rows']) | (old['hash'] != fingerprints['hash'])]
+    removed = cache['fingerprints'].index.difference(fingerprints.index)
+    if len(changed) == 0 and len(removed) == 0:
+        return cache
+
+    stats = cache['stats']
+    kept = stats[~stats['year'].isin(changed.union(removed))]
+    fresh = _aggregate(records[records['year'].isin(changed)])
+    stats = pd.concat([kept, fresh], ignore_index=True).sort_values(['taxon', 'year'], ignore_index=True)
+    return {'taxon_col': taxon_col, 'grid_res': grid_res, 'fingerprints': fingerprints, 'stats': stats}
+
+
+def _slope(matrix, years):
+    # Least-squares slope of every row against the year axis in one pass
+    x = years - years.mean()
+    y = matrix - matrix.mean(axis=1, keepdims=True)
+    return (y @ x) / (x @ x) if len(years) > 1 else np.zeros(len(matrix))
+
+
+def compute_trends(stats, window=ROLLING_WINDOW, recent_years=None):
+    """Per-taxon trend summary from yearly stats.
+
+    Years without records are filled with zero so rolling means and slopes
+    are computed on a complete year axis. If recent_years is given, slopes
+    are fitted over the last recent_years years only.
+    """
+    if stats.empty:
+        return pd.DataFrame(columns=['taxon', 'total', 'years_observed', 'latest_rolling_mean',
+                                     'count_slope', 'cells_slope', 'relative_slope'])
+
+    years = np.arange(stats['year'].min(), stats['year'].max() + 1)
+    counts = stats.pivot(index='taxon', columns='year', values='count').reindex(columns=years, fill_value=0).fillna(0)
+    cells = stats.pivot(index='taxon', columns='year', values='cells').reindex(columns=years, fill_value=0).fillna(0)
+
+    fit_years = years if recent_years is None else years[-recent_years:]
+    count_values = counts[fit_years].to_numpy(dtype=float)
+    cell_values = cells[fit_years].to_numpy(dtype=float)
+
+    count_slope = _slope(count_values, fit_years.astype(float))
+    cells_slope = _slope(cell_values, fit_years.astype(float))
+    mean_count = count_values.mean(axis=1)
+    # Slope as a fraction of the mean yearly count, comparable across common and rare taxa
+    relative_slope = np.divide(count_slope, mean_count, out=np.zeros_like(count_slope), where=mean_count > 0)
+
+    trends = pd.DataFrame({
+        'taxon': counts.index,
+        'total': counts.to_numpy().sum(axis=1).astype(int),
+        'years_observed': (counts.to_numpy() > 0).sum(axis=1),
+        # Only the latest window is reported, and the year axis is zero-filled
+        'latest_rolling_mean': counts.iloc[:, -window:].mean(axis=1).to_numpy(),
+        'count_slope': count_slope,
+        'cells_slope': cells_slope,
+        'relative_slope': relative_slope,
+    })
+    return trends
+
+
+def read_trend_cache(cache_path):
+    """Trend cache saved at cache_path, or None if missing or unreadable."""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        cache = pd.read_pickle(cache_path)
+    except Exception as e:
+        print(f"Could not read trend cache, rebuilding: {e}")
+        return None
+    # Caches from before fingerprinting stored only the stats frame
+    return cache if isinstance(cache, dict) else None
+
+
+def write_trend_cache(cache, cache_path):
+    """Save the trend cache; returns False if it could not be written (e.g. read-only disk)."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        pd.to_pickle(cache, cache_path)
+    except Exception as e:
+        print(f"Could not write trend cache, keeping it in memory: {e}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    input_file = r"c:\Users\ASUS\Desktop\Biodiversity\data\cleaned_dataset.csv"
+    cache_file = r"c:\Users\ASUS\Desktop\Biodiversity\data\trend_cache.pkl"
+    df = pd.read_csv(input_file)
+    cache = read_trend_cache(cache_file)
+    updated = update_trend_cache(cache, df)
+    if updated is not cache:
+        write_trend_cache(updated, cache_file)
+    trends = compute_trends(updated['stats'])
+    print("Fastest declining taxa:")
+    print(trends.sort_values('relative_slope').head(10))
+    print("Fastest increasing taxa:")
+    print(trends.sort_values('relative_slope', ascending=False).head(10))